@@ -0,0 +1,218 @@
+"""Micro-benchmarks for the agent's hot paths.
+
+    python benchmark.py prompts            # per-call prompt/chain overhead (offline)
+    python benchmark.py prompts --live 5   # ...plus cached-token ratio over 5 real LLM calls
+    python benchmark.py serialize          # CPU time to turn SQL results into a response
+"""
+import argparse
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+from config import llm, TOOL_RESULT_PREVIEW_ROWS
+from graph_agent import model_with_tools, system_message, system_prompt
+from helpers import get_database_schema
+from models import QueryReflection, SqlExecutionResult
+from serialization import dumps_compact
+from tools import tools, reflection_prompt
+
+SAMPLE_QUESTION = "Which 5 products sold the most units last month?"
+SAMPLE_SQL = "SELECT TOP 5 productname, SUM(qty) AS units FROM SalesData GROUP BY productname ORDER BY units DESC"
+
+
+def time_per_call(fn, repeat: int) -> float:
+    """Return the mean wall time of fn() in microseconds."""
+    fn()  # Warm up lazy imports and caches
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start_time) / repeat * 1e6
+
+
+def rebuild_reflection_prompt():
+    """What reflect_on_sql used to do on every call before formatting
+    (the template is the pre-change one, verbatim)."""
+    json_parser = JsonOutputParser(pydantic_object=QueryReflection)
+    format_instructions = json_parser.get_format_instructions()
+
+    reflection_prompt = ChatPromptTemplate.from_template(
+        """
+You are a Senior SQL Developer reviewing a query for accuracy and best practices.
+
+Database Schema:
+{schema}
+
+Original Question: {question}
+Generated SQL Query: {sql_query}
+
+Analyse this SQL query and provide structured feedback **strictly** in the
+following JSON format (no additional keys, no additional text):
+
+{format_instructions}
+"""
+    )
+
+    reflection_chain = reflection_prompt | llm | json_parser
+    return reflection_chain, reflection_prompt.invoke({
+        "schema": get_database_schema(),
+        "question": SAMPLE_QUESTION,
+        "sql_query": SAMPLE_SQL,
+        "format_instructions": format_instructions,
+    })
+
+
+def reuse_reflection_prompt():
+    return reflection_prompt.invoke({
+        "schema": get_database_schema(),
+        "question": SAMPLE_QUESTION,
+        "sql_query": SAMPLE_SQL,
+    })
+
+
+def rebuild_agent_step():
+    """What business_intelligence_agent used to do on every step before invoking."""
+    return llm.bind_tools(tools), [SystemMessage(content=system_prompt), HumanMessage(content=SAMPLE_QUESTION)]
+
+
+def reuse_agent_step():
+    return model_with_tools, [system_message, HumanMessage(content=SAMPLE_QUESTION)]
+
+
+def cached_token_counts(message) -> tuple[int, int]:
+    """Return (prompt_tokens, cached_prompt_tokens) reported for a response."""
+    usage = message.usage_metadata or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached is None:
+        token_usage = message.response_metadata.get("token_usage") or {}
+        cached = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    return usage.get("input_tokens", 0), cached or 0
+
+
+def bench_prompts(args):
+    print(f"{'step':<22}{'rebuilt (µs)':>14}{'prebuilt (µs)':>15}")
+    for name, old, new in (
+        ("reflect_on_sql", rebuild_reflection_prompt, reuse_reflection_prompt),
+        ("agent step", rebuild_agent_step, reuse_agent_step),
+    ):
+        print(f"{name:<22}{time_per_call(old, args.repeat):>14.1f}{time_per_call(new, args.repeat):>15.1f}")
+
+    if not args.live:
+        return
+
+    # Provider prompt caching needs >= 1024 identical leading tokens, and the
+    # first call only primes the cache, so look at the ratio over several calls.
+    for name, run in (
+        ("reflect_on_sql", lambda: (reflection_prompt | llm).invoke({
+            "schema": get_database_schema(),
+            "question": SAMPLE_QUESTION,
+            "sql_query": SAMPLE_SQL,
+        })),
+        ("agent step", lambda: model_with_tools.invoke([system_message, HumanMessage(content=SAMPLE_QUESTION)])),
+    ):
+        prompt_tokens = cached_tokens = 0
+        for _ in range(args.live):
+            total, cached = cached_token_counts(run())
+            prompt_tokens += total
+            cached_tokens += cached
+        ratio = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+        print(f"{name}: {cached_tokens}/{prompt_tokens} prompt tokens served from cache ({ratio:.0%})")
+
+
+def sample_rows(count: int) -> list[dict]:
+    """Rows shaped like a typical SalesData result."""
+    start_date = datetime(2024, 1, 1)
+    return [
+        {
+            "branchid": i % 40,
+            "BranchName": f"Branch {i % 40}",
+            "productname": f"Product {i % 5000}",
+            "qty": float(i % 17),
+            "amount": round(i * 1.37, 2),
+            "saledate": start_date + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def write_checkpoint(saver: SqliteSaver, tool_message: ToolMessage):
+    """Save a checkpoint whose messages channel holds tool_message, the way
+    the agent does after every graph step."""
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": [tool_message]}
+    saver.put({"configurable": {"thread_id": "bench", "checkpoint_ns": ""}}, checkpoint, {}, {})
+
+
+def json_round_trip_response(saver: SqliteSaver, result: SqlExecutionResult) -> bytes:
+    """The original path: the tool dumps indented JSON with every row, the
+    checkpoint stores it, main.py parses it back, FastAPI re-encodes the
+    payload and renders it."""
+    content = json.dumps(result.to_dict(), indent=2, default=str)
+    write_checkpoint(saver, ToolMessage(content=content, tool_call_id="call"))
+    data = json.loads(content)
+    payload = jsonable_encoder({"sql_query": data.get("sql_query"), "sql_results": data.get("results")})
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def artifact_response(saver: SqliteSaver, result: SqlExecutionResult) -> bytes:
+    """Rows as the ToolMessage artifact: a row preview for the model, but the
+    checkpoint still stores every row."""
+    content = dumps_compact(result.to_dict(max_rows=TOOL_RESULT_PREVIEW_ROWS)).decode()
+    write_checkpoint(saver, ToolMessage(content=content, tool_call_id="call", artifact=result))
+    return dumps_compact({"sql_query": result.sql_query, "sql_results": result.results})
+
+
+def side_channel_response(saver: SqliteSaver, result: SqlExecutionResult) -> bytes:
+    """The current path: only the row preview reaches the checkpoint; the
+    full result goes to the response through capture_execution_results."""
+    content = dumps_compact(result.to_dict(max_rows=TOOL_RESULT_PREVIEW_ROWS)).decode()
+    write_checkpoint(saver, ToolMessage(content=content, tool_call_id="call"))
+    return dumps_compact({"sql_query": result.sql_query, "sql_results": result.results})
+
+
+def cpu_ms(fn, *args) -> float:
+    start_time = time.process_time()
+    fn(*args)
+    return (time.process_time() - start_time) * 1000
+
+
+def bench_serialize(args):
+    """CPU time per response, including one checkpoint write. The agent
+    writes a checkpoint after every later graph step and turn too, so for the
+    first two paths the real cost is a multiple of the checkpoint share."""
+    saver = SqliteSaver(sqlite3.connect(":memory:", check_same_thread=False))
+    paths = (
+        ("json round trip", json_round_trip_response),
+        ("rows as artifact", artifact_response),
+        ("side channel", side_channel_response),
+    )
+    print(f"{'rows':>9}" + "".join(f"{name + ' (ms)':>24}" for name, _ in paths))
+    for count in args.rows:
+        rows = sample_rows(count)
+        result = SqlExecutionResult(sql_query=SAMPLE_SQL, success=True, analysis="", results=rows, row_count=count)
+        timings = [min(cpu_ms(fn, saver, result) for _ in range(args.repeat)) for _, fn in paths]
+        print(f"{count:>9}" + "".join(f"{ms:>24.2f}" for ms in timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prompts_parser = subparsers.add_parser("prompts", help="prompt/chain construction overhead and prompt caching")
+    prompts_parser.add_argument("--repeat", type=int, default=200)
+    prompts_parser.add_argument("--live", type=int, default=0, metavar="N",
+                                help="also make N real LLM calls per prompt and report cached-token ratio")
+    prompts_parser.set_defaults(func=bench_prompts)
+
+    serialize_parser = subparsers.add_parser("serialize", help="CPU time per chat response across result sizes")
+    serialize_parser.add_argument("--rows", type=int, nargs="+", default=[10, 1_000, 100_000, 1_000_000])
+    serialize_parser.add_argument("--repeat", type=int, default=3)
+    serialize_parser.set_defaults(func=bench_serialize)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -16,6 +16,21 @@ embedding_model = OpenAIEmbeddings(model="text-embedding-3-large")
 
 ENABLE_SERVER_SQL_EXEC = os.getenv("ENABLE_SERVER_SQL_EXEC", "false").lower() == "true"
 
+# Conversation checkpoints and cross-worker caches live in one SQLite file
+# (WAL mode) so every uvicorn worker sees the same state.
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "bi_agent_state.sqlite")
+
+# execute_sql_with_analysis shows the LLM only this many rows; the full result
+# set goes straight to the HTTP response without passing through the model.
+TOOL_RESULT_PREVIEW_ROWS = int(os.getenv("TOOL_RESULT_PREVIEW_ROWS", "50"))
+
+# Health probes run in the background and /status only reads their cached
+# results. The LLM probe costs tokens, so it runs less often than the others.
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "60"))
+HEALTH_LLM_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_LLM_PROBE_INTERVAL_SECONDS", "300"))
+HEALTH_DEEP_CHECK_MIN_INTERVAL_SECONDS = float(os.getenv("HEALTH_DEEP_CHECK_MIN_INTERVAL_SECONDS", "30"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "10"))
+
 if ENABLE_SERVER_SQL_EXEC:
     sql_user = os.getenv("SQL_USER")
     sql_pass = os.getenv("SQL_PASSWORD")
@@ -1,7 +1,11 @@
 import os
+import pickle
+import shutil
+import faiss
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
 from config import embedding_model, ENABLE_SERVER_SQL_EXEC
+from shared_state import cross_process_lock
 
 if not ENABLE_SERVER_SQL_EXEC:
     retriever = None
@@ -43,49 +47,74 @@ def get_table_schema_from_uri(table_name: str):
 # Build or load a FAISS index over the table schemas so we can RAG the schema text
 INDEX_PATH = "faiss_schema_index"
 
-if os.path.exists(INDEX_PATH):
+def load_vector_index():
+    """Load the saved FAISS index memory-mapped and read-only.
+
+    Mirrors FAISS.load_local, but maps the index file instead of copying it
+    onto the heap, so every worker process shares the same physical pages.
+    Returns None if no usable index is on disk.
+    """
+    if not os.path.exists(INDEX_PATH):
+        return None
     try:
-        vector_index = FAISS.load_local(
-            INDEX_PATH,
-            embedding_model,
-            allow_dangerous_deserialization=True,  # Index created locally and trusted
-        )
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        # Newer faiss builds can also map flat (IndexFlatCodes) storage
+        io_flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        index = faiss.read_index(os.path.join(INDEX_PATH, "index.faiss"), io_flags)
+        # Index created locally and trusted
+        with open(os.path.join(INDEX_PATH, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(embedding_model, index, docstore, index_to_docstore_id)
     except Exception as e:
         print(f"⚠️  Unable to load existing FAISS index ({e}). Rebuilding …")
-        vector_index = None  # Trigger rebuild below
-else:
-    vector_index = None  # No index directory yet
+        return None
 
-if ENABLE_SERVER_SQL_EXEC:
-    if vector_index is None:
-        schema_docs: list[Document] = []
-        for table in inspector.get_table_names():
-            if table.startswith("_xlnm"):
-                # Skip potential Excel filter tables in some databases
-                continue
-            info = get_table_schema_from_uri(table)
-            if not info:
-                continue
+vector_index = load_vector_index()
 
-            cols_text = "\n".join(
-                f"- {col['column_name']} ({col['data_type']}, nullable={col['nullable']})"
-                for col in info["columns"]
-            )
-            sample_text = "\n".join(str(r) for r in info["sample_data"][:2])
+def build_vector_index():
+    """Embed every table schema and save the index atomically to INDEX_PATH."""
+    schema_docs: list[Document] = []
+    for table in inspector.get_table_names():
+        if table.startswith("_xlnm"):
+            # Skip potential Excel filter tables in some databases
+            continue
+        info = get_table_schema_from_uri(table)
+        if not info:
+            continue
 
-            content = (
-                f"Table: {table}\n\n"
-                f"Columns:\n{cols_text}\n\n"
-                f"Sample Rows:\n{sample_text}"
-            )
-            schema_docs.append(Document(page_content=content, metadata={"table": table}))
+        cols_text = "\n".join(
+            f"- {col['column_name']} ({col['data_type']}, nullable={col['nullable']})"
+            for col in info["columns"]
+        )
+        sample_text = "\n".join(str(r) for r in info["sample_data"][:2])
+
+        content = (
+            f"Table: {table}\n\n"
+            f"Columns:\n{cols_text}\n\n"
+            f"Sample Rows:\n{sample_text}"
+        )
+        schema_docs.append(Document(page_content=content, metadata={"table": table}))
+
+    if not schema_docs:
+        raise RuntimeError("No tables discovered to build schema index.")
 
-        # If we actually collected docs, build the index
-        if schema_docs:
-            vector_index = FAISS.from_documents(schema_docs, embedding_model)
-            vector_index.save_local(INDEX_PATH)
-        else:
-            raise RuntimeError("No tables discovered to build schema index.")
+    # Save next to the final location and swap it in, so other workers never
+    # see a half-written index
+    tmp_path = f"{INDEX_PATH}.tmp-{os.getpid()}"
+    FAISS.from_documents(schema_docs, embedding_model).save_local(tmp_path)
+    shutil.rmtree(INDEX_PATH, ignore_errors=True)
+    os.replace(tmp_path, INDEX_PATH)
+
+if ENABLE_SERVER_SQL_EXEC:
+    if vector_index is None:
+        # Only one worker builds the index; the rest wait and then load it
+        with cross_process_lock("faiss_schema_index"):
+            vector_index = load_vector_index()
+            if vector_index is None:
+                build_vector_index()
+                vector_index = load_vector_index()
+        if vector_index is None:
+            raise RuntimeError("FAISS schema index could not be loaded after building it.")
 
     # Create a retriever for the agent
-    retriever = vector_index.as_retriever(search_kwargs={"k": 3})
\ No newline at end of file
+    retriever = vector_index.as_retriever(search_kwargs={"k": 3})
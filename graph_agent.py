@@ -4,17 +4,13 @@ from config import llm
 from tools import tools
 from langgraph.graph import StateGraph
 from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
 from config import ENABLE_SERVER_SQL_EXEC
+from shared_state import connect
 
 
-def business_intelligence_agent(state: BusinessIntelligenceState):
-    """
-    Enhanced AI agent that uses reflection to validate SQL queries.
-    This agent now has a quality assurance process!
-    """
-    if ENABLE_SERVER_SQL_EXEC:
-        system_prompt = """You are a Senior Business Intelligence Analyst with a quality-first approach.
+if ENABLE_SERVER_SQL_EXEC:
+    system_prompt = """You are a Senior Business Intelligence Analyst with a quality-first approach.
 
         Your enhanced workflow:
         1. For business questions, use generate_sql to create SQL queries
@@ -31,8 +27,8 @@ def business_intelligence_agent(state: BusinessIntelligenceState):
 
         Always explain your reasoning and what the reflection process revealed.
     """
-    else:
-        system_prompt = """You are a Senior Business Intelligence Analyst with a quality-first approach.
+else:
+    system_prompt = """You are a Senior Business Intelligence Analyst with a quality-first approach.
 
         Your enhanced workflow:
         1. For business questions, use generate_sql to create SQL queries
@@ -44,11 +40,22 @@ def business_intelligence_agent(state: BusinessIntelligenceState):
         - generate_sql: Convert questions to SQL queries
         - reflect_on_sql: Validate and analyze SQL queries
     """
-    
+
+# Built once at import: every agent step sends the same tool definitions and
+# system message first, which keeps the request prefix eligible for the
+# provider's prompt cache.
+system_message = SystemMessage(content=system_prompt)
+model_with_tools = llm.bind_tools(tools)
+
+
+def business_intelligence_agent(state: BusinessIntelligenceState):
+    """
+    Enhanced AI agent that uses reflection to validate SQL queries.
+    This agent now has a quality assurance process!
+    """
     messages = state["messages"]
-    messages_with_system = [SystemMessage(content=system_prompt)] + messages
+    messages_with_system = [system_message] + messages
     
-    model_with_tools = llm.bind_tools(tools)
     response = model_with_tools.invoke(messages_with_system)
     
     return {"messages": [response]}
@@ -87,7 +94,9 @@ def create_enhanced_bi_agent():
     
     graph_builder.add_edge("tools", "agent")
     
-    memory = MemorySaver()
+    # Conversation threads are checkpointed to the shared SQLite file so a
+    # thread_id keeps working whichever worker the request lands on.
+    memory = SqliteSaver(connect())
     return graph_builder.compile(checkpointer=memory)
 
 agent = create_enhanced_bi_agent()
\ No newline at end of file
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable
+from datetime import datetime, timezone
+from sqlalchemy import text
+from langchain_openai import ChatOpenAI
+from config import (
+    llm,
+    SHARED_STATE_PATH,
+    engine,
+    ENABLE_SERVER_SQL_EXEC,
+    HEALTH_PROBE_INTERVAL_SECONDS,
+    HEALTH_LLM_PROBE_INTERVAL_SECONDS,
+    HEALTH_DEEP_CHECK_MIN_INTERVAL_SECONDS,
+    HEALTH_PROBE_TIMEOUT_SECONDS,
+)
+import db_setup
+import graph_agent
+from shared_state import SharedCache
+
+# A one-token completion is the cheapest request that still proves the
+# API key, network path and model are all usable. It gets its own client
+# with a short timeout and no retries so a hung API call cannot hold up the
+# other probes.
+llm_probe = ChatOpenAI(
+    model=llm.model_name,
+    max_tokens=1,
+    timeout=HEALTH_PROBE_TIMEOUT_SECONDS,
+    max_retries=0,
+)
+
+
+def probe_llm():
+    """Return probe details if the LLM answers, raise otherwise."""
+    llm_probe.invoke("ping")
+    return {}
+
+
+def probe_database():
+    """Check out a pooled connection and run a trivial query."""
+    if not ENABLE_SERVER_SQL_EXEC:
+        return None
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {"pool": engine.pool.status()}
+
+
+def probe_retriever():
+    """Check that the FAISS schema index is loaded and non-empty.
+
+    This inspects the in-memory index only; it deliberately does not embed a
+    query, which would cost an embeddings API call on every probe.
+    """
+    if db_setup.retriever is None:
+        return None
+    total = db_setup.vector_index.index.ntotal
+    if total == 0:
+        raise RuntimeError("FAISS schema index is empty")
+    return {"indexed_tables": total}
+
+
+def probe_agent():
+    """Check the parts of the agent that can break after startup.
+
+    The graph itself is compiled once at import, so its structure cannot
+    change; what can fail is the checkpointer's SQLite connection (disk full,
+    file removed, lock held) and the tool binding the agent node relies on.
+    The graph is not invoked, so no LLM calls are made and no checkpoint
+    threads are created.
+    """
+    with graph_agent.agent.checkpointer.cursor(transaction=False) as cur:
+        cur.execute("SELECT 1")
+    bound_tools = graph_agent.model_with_tools.kwargs.get("tools") or []
+    if len(bound_tools) != len(graph_agent.tools):
+        raise RuntimeError(
+            f"Agent model has {len(bound_tools)} tools bound, expected {len(graph_agent.tools)}"
+        )
+    return {"bound_tools": len(bound_tools)}
+
+
+@dataclass
+class HealthProbe:
+    name: str
+    check: Callable[[], dict | None]
+    interval_seconds: float
+
+    def run(self) -> dict:
+        """Run the check and return its outcome. Never raises."""
+        start_time = time.perf_counter()
+        try:
+            details = self.check()
+            status, error = ("disabled", None) if details is None else ("ok", None)
+        except Exception as e:
+            details, status, error = None, "error", str(e)
+        return {
+            "status": status,
+            "checked_at": time.time(),
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            "details": details,
+            "error": error,
+        }
+
+
+def _snapshot(probe: HealthProbe, record: dict | None, now: float) -> dict:
+    if record is None:
+        return {"status": "unknown", "checked_at": None, "age_seconds": None,
+                "latency_ms": None, "details": None, "error": None}
+    checked_at = record["checked_at"]
+    age_seconds = now - checked_at
+    snapshot = {
+        **record,
+        "checked_at": datetime.fromtimestamp(checked_at, timezone.utc).isoformat(),
+        "age_seconds": round(age_seconds, 1),
+    }
+    # A result that should have been refreshed twice over means the probe
+    # loop is stuck or dead; don't keep vouching for the last "ok".
+    if age_seconds > 2 * probe.interval_seconds:
+        snapshot["status"] = "stale"
+    return snapshot
+
+
+probes = {
+    "llm": HealthProbe("llm", probe_llm, HEALTH_LLM_PROBE_INTERVAL_SECONDS),
+    "database": HealthProbe("database", probe_database, HEALTH_PROBE_INTERVAL_SECONDS),
+    "retriever": HealthProbe("retriever", probe_retriever, HEALTH_PROBE_INTERVAL_SECONDS),
+    "agent": HealthProbe("agent", probe_agent, HEALTH_PROBE_INTERVAL_SECONDS),
+}
+
+# Results and leases are shared, so with several workers each probe still
+# runs once per interval and every worker reports the same status. They get
+# their own file and a short busy timeout so large checkpoint writes to the
+# main state file never hold them up.
+HEALTH_STATE_PATH = f"{SHARED_STATE_PATH}.health"
+results_cache = SharedCache("health", path=HEALTH_STATE_PATH, timeout=1.0)
+leases = SharedCache("health_lease", path=HEALTH_STATE_PATH, timeout=1.0)
+
+# This worker's copy of the shared results, refreshed by the probe loop.
+# /status reads only this, so it never waits on SQLite.
+_latest_records: dict = {}
+
+
+def _run_probes(only_due: bool):
+    global _latest_records
+    for name, probe in probes.items():
+        if only_due and leases.claim(name, probe.interval_seconds) is not None:
+            continue  # Another worker (or an earlier tick) probed it recently
+        results_cache.set(name, probe.run())
+    _latest_records = results_cache.get_all()
+
+
+def get_cached_status() -> dict:
+    """Return the last recorded result of every probe without running any."""
+    now = time.time()
+    records = _latest_records
+    return {name: _snapshot(probe, records.get(name), now) for name, probe in probes.items()}
+
+
+def run_deep_check():
+    """Run every probe immediately, at most once per
+    HEALTH_DEEP_CHECK_MIN_INTERVAL_SECONDS across all callers and workers.
+
+    Returns the number of seconds to wait if the check was rate-limited,
+    otherwise None.
+    """
+    retry_after = leases.claim("deep_check", HEALTH_DEEP_CHECK_MIN_INTERVAL_SECONDS)
+    if retry_after is not None:
+        return retry_after
+    _run_probes(only_due=False)
+    return None
+
+
+async def run_probe_loop():
+    """Refresh due probes forever; meant to run as a background task."""
+    # Tick at half the shortest interval so a due probe is picked up promptly
+    # and never ages past the stale threshold between ticks.
+    tick = min(probe.interval_seconds for probe in probes.values()) / 2
+    while True:
+        try:
+            await asyncio.to_thread(_run_probes, True)
+        except Exception as e:
+            # Keep the loop alive; affected probes will show up as stale
+            print(f"⚠️  Health probe loop failed: {e}")
+        await asyncio.sleep(tick)
@@ -1,5 +1,6 @@
 from config import engine, inspector, ENABLE_SERVER_SQL_EXEC
 from decimal import Decimal
+from functools import lru_cache
 from sqlalchemy import text
 from static_schema import static_schema
 
@@ -38,6 +39,7 @@ def execute_database_query(query: str):
     except Exception as e:
         raise Exception(f"Database query failed: {str(e)}")
 
+@lru_cache(maxsize=1)
 def get_database_schema():
     """Return a textual representation of the schema.
 
@@ -45,6 +47,9 @@ def get_database_schema():
 
     • ENABLE_SERVER_SQL_EXEC=True  → Introspect the live DB (legacy behaviour)
     • ENABLE_SERVER_SQL_EXEC=False → Load pre-generated schema from SCHEMA_PATH
+
+    The result is cached for the life of the process: introspection is slow,
+    and an identical schema string keeps the reflection prompt prefix cacheable.
     """
 
     # Remote execution – still have DB connection
@@ -1,16 +1,28 @@
-import json
+import math
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from config import llm, ENABLE_SERVER_SQL_EXEC
-from helpers import execute_database_query
+from config import ENABLE_SERVER_SQL_EXEC
 from models import ChatRequest
 from graph_agent import agent
+from tools import capture_execution_results
+from serialization import CompactJSONResponse
+import health
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the cached health status fresh for the lifetime of the worker
+    probe_task = asyncio.create_task(health.run_probe_loop())
+    yield
+    probe_task.cancel()
 
 # fastAPI setup
 app = FastAPI(
     title="BI Agent with SQL Reflection",
     description="A Business Intelligence Agent with built-in SQL validation and reflection!",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # just a home route to see if the server is running or not
@@ -18,61 +30,74 @@ app = FastAPI(
 async def hello_world():
     return {"message": "Hello World! My BI Agent now validates SQL with reflection!"}
 
-# status route, to see if everything is working fine or not => not an important route
+# status route, serves the cached results of the background health probes so
+# load balancers can poll it cheaply. Pass ?deep=true to re-run every probe now.
 @app.get("/status")
-async def check_status():
-    """Enhanced status check with reflection testing"""
-    try:
-        # Test basic AI
-        test_message = HumanMessage(content="Say 'Enhanced BI ready!'")
-        ai_response = llm.invoke([test_message])
-        if ai_response:
-            ai_working = True
-        else:        
-            ai_working = False
-    except Exception:
-        ai_working = False
-    
-    if ENABLE_SERVER_SQL_EXEC:
-        try:
-            # Test database (simple lightweight query)
-            results = execute_database_query("SELECT COUNT(*) as total FROM customers")
-            if results:
-                db_working = True
-                total_customers = results[0]['total']
-            else:
-                db_working = False
-                total_customers = 0    
-        except Exception:
-            db_working = False
-            total_customers = 0
-    else:
-        db_working = False
-        total_customers = 0
-    
-    try:
-        # Test enhanced agent
-        test_response = agent.invoke(
-            {"messages": [HumanMessage(content="How many customers do we have?")]},
-            config={"configurable": {"thread_id": "test"}}
-        )
-        if test_response:
-            agent_working = True
-        else:
-            agent_working = False
-    except Exception:
-        agent_working = False
-    
+async def check_status(deep: bool = False):
+    """Return cached health status, optionally forcing a rate-limited deep check"""
+    if deep:
+        retry_after = await asyncio.to_thread(health.run_deep_check)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Deep health check ran recently; use GET /status for the cached results.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    checks = health.get_cached_status()
     return {
         "status": "running",
-        "ai_working": ai_working,
-        "database_working": db_working,
-        "enhanced_agent_working": agent_working,
-        "total_customers": total_customers
+        "ai_working": checks["llm"]["status"] == "ok",
+        "database_working": checks["database"]["status"] == "ok",
+        "enhanced_agent_working": checks["agent"]["status"] == "ok",
+        "checks": checks,
     }
 
+def collect_tool_results(messages: list, execution_results: dict):
+    """Pull tool usage and results for the latest turn out of a thread's messages.
+
+    Only messages after the last HumanMessage are considered: earlier turns
+    come back from the checkpoint and must not leak into this response.
+    Returns (used_tools, reflection_results, sql_query, sql_results).
+    """
+    turn_start = 0
+    for idx, msg in enumerate(messages):
+        if isinstance(msg, HumanMessage):
+            turn_start = idx
+    turn_messages = messages[turn_start:]
+
+    used_tools = []
+    reflection_results = None
+    sql_query = None
+    sql_results = None
+
+    # Create a map of tool_call_id to tool_name for accurate lookup
+    tool_call_map = {}
+    for msg in turn_messages:
+        if isinstance(msg, AIMessage) and msg.tool_calls:
+            for tool_call in msg.tool_calls:
+                tool_call_map[tool_call["id"]] = tool_call["name"]
+                if tool_call["name"] not in used_tools:
+                    used_tools.append(tool_call["name"])
+
+    # Reflection comes back as the ToolMessage artifact (a plain dict, so it
+    # survives the checkpoint as-is); SQL results come through the per-request
+    # side channel so nothing has to be re-parsed from the message text
+    for msg in turn_messages:
+        if not isinstance(msg, ToolMessage):
+            continue
+        tool_name = tool_call_map.get(msg.tool_call_id)
+        if tool_name == "reflect_on_sql" and isinstance(msg.artifact, dict):
+            reflection_results = msg.artifact
+        elif tool_name == "execute_sql_with_analysis" and msg.tool_call_id in execution_results:
+            execution = execution_results[msg.tool_call_id]
+            sql_results = execution.results
+            sql_query = execution.sql_query
+
+    return used_tools, reflection_results, sql_query, sql_results
+
 # main route, responsible to taking the natural language qiestion in chat request
-@app.post("/api/chat")
+@app.post("/api/chat", response_class=CompactJSONResponse)
 async def chat_with_enhanced_agent(request: ChatRequest):
     """
     Chat with our enhanced agent that uses reflection for quality assurance!
@@ -82,44 +107,24 @@ async def chat_with_enhanced_agent(request: ChatRequest):
         print(f"🆔 Thread ID: {request.thread_id}")
         
         # agent does the heavy lifting NL => SQL => Reflection on SQL => Regenrate SQL => Execute SQL(server side)
-        response = agent.invoke(
-            {"messages": [HumanMessage(content=request.message)]},
-            config={"configurable": {"thread_id": request.thread_id}}
-        )
+        # The graph blocks for the whole run, so keep it off the event loop;
+        # /status and the health probe loop must stay responsive meanwhile.
+        # to_thread copies the context, so the tools still see the capture dict.
+        with capture_execution_results() as sql_execution_results:
+            response = await asyncio.to_thread(
+                agent.invoke,
+                {"messages": [HumanMessage(content=request.message)]},
+                config={"configurable": {"thread_id": request.thread_id}}
+            )
         
         last_message = response["messages"][-1]
         agent_reply = last_message.content
         
         print(f"🤖 Agent responded: {agent_reply}")
         
-        # More robust analysis of tool usage and results
-        used_tools = []
-        reflection_results = None
-        sql_query = None
-        sql_results = None
-        
-        # Create a map of tool_call_id to tool_name for accurate lookup
-        tool_call_map = {}
-        for msg in response["messages"]:
-            if isinstance(msg, AIMessage) and msg.tool_calls:
-                for tool_call in msg.tool_calls:
-                    tool_call_map[tool_call["id"]] = tool_call["name"]
-                    if tool_call["name"] not in used_tools:
-                        used_tools.append(tool_call["name"])
-
-        # Find the results associated with each tool call
-        for msg in response["messages"]:
-            if isinstance(msg, ToolMessage):
-                tool_name = tool_call_map.get(msg.tool_call_id)
-                try:
-                    data = json.loads(msg.content)
-                    if tool_name == "reflect_on_sql":
-                        reflection_results = data
-                    elif tool_name == "execute_sql_with_analysis":
-                        sql_results = data.get("results")
-                        sql_query = data.get("sql_query")
-                except (json.JSONDecodeError, TypeError):
-                    continue
+        used_tools, reflection_results, sql_query, sql_results = collect_tool_results(
+            response["messages"], sql_execution_results
+        )
         
         # ---------------------------------------------------------------
         # When server-side execution is DISABLED we still want to return
@@ -149,7 +154,7 @@ async def chat_with_enhanced_agent(request: ChatRequest):
         # server-side execution is disabled, as the client can run the
         # query locally.
         if not ENABLE_SERVER_SQL_EXEC:
-            return {
+            return CompactJSONResponse({
                 "user_message": request.message,
                 "tools_used": used_tools,
                 "sql_query": sql_query,
@@ -157,9 +162,9 @@ async def chat_with_enhanced_agent(request: ChatRequest):
                 "reflection_results": reflection_results,
                 "thread_id": request.thread_id,
                 "success": True,
-            }
+            })
         else:
-            return {
+            return CompactJSONResponse({
                 "user_message": request.message,
                 "agent_response": agent_reply,
                 "tools_used": used_tools,
@@ -169,7 +174,7 @@ async def chat_with_enhanced_agent(request: ChatRequest):
                 "reflection_results": reflection_results,
                 "thread_id": request.thread_id,
                 "success": True
-            }
+            })
         
     except Exception as e:
         print(f"❌ Error in enhanced chat: {str(e)}")
@@ -1,5 +1,6 @@
 from langchain_core.pydantic_v1 import BaseModel as LangChainBaseModel, Field
 from pydantic import BaseModel
+from dataclasses import dataclass
 from typing import Annotated, TypedDict, List
 from langgraph.graph.message import add_messages
 
@@ -28,4 +29,37 @@ class BusinessIntelligenceState(TypedDict):
 
 class ChatRequest(BaseModel):
     message: str
-    thread_id: str = "default"
\ No newline at end of file
+    thread_id: str = "default"
+
+@dataclass(slots=True)
+class SqlExecutionResult:
+    """
+    Outcome of execute_sql_with_analysis, handed to the HTTP layer through
+    tools.capture_execution_results so the rows are never round-tripped
+    through JSON or written into the thread's checkpoints.
+    """
+    sql_query: str
+    success: bool
+    analysis: str
+    results: list[dict] | None = None
+    row_count: int | None = None
+    execution_time_seconds: float | None = None
+    message: str | None = None
+    error: str | None = None
+
+    def to_dict(self, max_rows: int | None = None) -> dict:
+        """Return the populated fields, optionally keeping only the first max_rows rows."""
+        data = {
+            "sql_query": self.sql_query,
+            "results": self.results,
+            "row_count": self.row_count,
+            "execution_time_seconds": self.execution_time_seconds,
+            "success": self.success,
+            "message": self.message,
+            "error": self.error,
+            "analysis": self.analysis,
+        }
+        if max_rows is not None and self.results is not None and len(self.results) > max_rows:
+            data["results"] = self.results[:max_rows]
+            data["results_truncated"] = True
+        return {key: value for key, value in data.items() if value is not None}
@@ -0,0 +1,40 @@
+import json
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    # orjson has no PyPy build; the stdlib encoder produces the same output
+    orjson = None
+
+
+def dumps_compact(obj) -> bytes:
+    """Encode obj as compact (non-indented) UTF-8 JSON.
+
+    Values JSON cannot represent (dates, Decimals, …) are written with str(),
+    matching what the tools have always returned. orjson is used when
+    available; anything it refuses (e.g. ints wider than 64 bits) falls back
+    to the stdlib so both paths accept the same inputs.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj,
+                default=str,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CompactJSONResponse(Response):
+    """JSON response encoded once with dumps_compact.
+
+    Return an instance directly from a route: FastAPI then skips its own
+    jsonable_encoder pass over the payload.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps_compact(content)
@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from config import SHARED_STATE_PATH
+
+
+def connect(path: str = SHARED_STATE_PATH, timeout: float = 30.0, **kwargs) -> sqlite3.Connection:
+    """Open a connection to the shared state file in WAL mode.
+
+    WAL lets every worker read concurrently while one of them writes, so
+    checkpoints and cache entries written by one process are immediately
+    visible to the others.
+    """
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def cross_process_lock(name: str, timeout: float = 600.0):
+    """Hold an exclusive lock shared by every worker process.
+
+    Each lock gets its own small SQLite file so that holding it (e.g. while
+    building the FAISS index) never blocks writes to the shared state file.
+    """
+    conn = sqlite3.connect(f"{SHARED_STATE_PATH}.{name}.lock", timeout=timeout, isolation_level=None)
+    try:
+        conn.execute("BEGIN EXCLUSIVE")
+        yield
+    finally:
+        conn.close()  # Rolls back the empty transaction and releases the lock
+
+
+class SharedCache:
+    """JSON key/value cache with optional expiry, shared by every worker."""
+
+    def __init__(self, namespace: str, path: str = SHARED_STATE_PATH, timeout: float = 30.0):
+        self.namespace = namespace
+        # Autocommit mode, so claim() can manage its own IMMEDIATE transaction
+        self._conn = connect(path, timeout=timeout, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS shared_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+
+    def get(self, key: str):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM shared_cache"
+                " WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_all(self) -> dict:
+        """Return every live entry in this namespace."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM shared_cache"
+                " WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (self.namespace, time.time()),
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, key: str, value, ttl: float | None = None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_cache (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, default=str), expires_at),
+            )
+
+    def claim(self, key: str, ttl: float) -> float | None:
+        """Atomically take a lease on `key` for `ttl` seconds.
+
+        Returns None if this caller now holds the lease, otherwise the number
+        of seconds until the current holder's lease expires. Used to make sure
+        only one worker performs a periodic job per interval.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT expires_at FROM shared_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row and row[0] is not None and row[0] > now:
+                    return row[0] - now
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO shared_cache (namespace, key, value, expires_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(now), now + ttl),
+                )
+                return None
+            finally:
+                self._conn.execute("COMMIT")
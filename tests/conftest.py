@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# config.py reads these at import time. The tests never reach OpenAI, and
+# shared state goes to a scratch directory instead of the working tree.
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["SHARED_STATE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bi_agent_tests_"), "state.sqlite")
@@ -0,0 +1,85 @@
+import json
+import sqlite3
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import StateGraph
+from langgraph.prebuilt import ToolNode
+import tools
+from config import TOOL_RESULT_PREVIEW_ROWS
+from main import collect_tool_results
+from models import BusinessIntelligenceState
+
+ROWS = [{"n": i} for i in range(TOOL_RESULT_PREVIEW_ROWS + 150)]
+REFLECTION = {"is_valid": True, "confidence": 9}
+THREAD = {"configurable": {"thread_id": "t1"}}
+
+
+def scripted_agent(state: BusinessIntelligenceState):
+    """Stands in for the LLM: asks for reflection + execution on "run sql"."""
+    last_message = state["messages"][-1]
+    if isinstance(last_message, HumanMessage) and last_message.content == "run sql":
+        return {"messages": [AIMessage(content="", tool_calls=[
+            {"id": "reflect-1", "name": "reflect_on_sql",
+             "args": {"sql_query": "SELECT n FROM t", "original_question": "run sql"}},
+            {"id": "execute-1", "name": "execute_sql_with_analysis",
+             "args": {"sql_query": "SELECT n FROM t"}},
+        ])]}
+    return {"messages": [AIMessage(content="done")]}
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    monkeypatch.setattr(tools, "reflection_chain", RunnableLambda(lambda _: REFLECTION))
+    monkeypatch.setattr(tools, "ENABLE_SERVER_SQL_EXEC", True)
+    monkeypatch.setattr(tools, "execute_database_query", lambda query: (ROWS, len(ROWS)))
+
+    graph_builder = StateGraph(BusinessIntelligenceState)
+    graph_builder.add_node("agent", scripted_agent)
+    graph_builder.add_node("tools", ToolNode(tools.tools))
+    graph_builder.set_entry_point("agent")
+    graph_builder.add_conditional_edges(
+        "agent",
+        lambda state: "tools" if state["messages"][-1].tool_calls else "__end__",
+        {"tools": "tools", "__end__": "__end__"},
+    )
+    graph_builder.add_edge("tools", "agent")
+    saver = SqliteSaver(sqlite3.connect(":memory:", check_same_thread=False))
+    return graph_builder.compile(checkpointer=saver)
+
+
+def ask(graph, message: str):
+    with tools.capture_execution_results() as execution_results:
+        response = graph.invoke({"messages": [HumanMessage(content=message)]}, config=THREAD)
+    return collect_tool_results(response["messages"], execution_results)
+
+
+def test_full_rows_reach_the_caller_but_not_the_checkpoint(graph):
+    used_tools, reflection_results, sql_query, sql_results = ask(graph, "run sql")
+
+    assert used_tools == ["reflect_on_sql", "execute_sql_with_analysis"]
+    assert reflection_results == REFLECTION
+    assert sql_query == "SELECT n FROM t"
+    assert sql_results == ROWS
+
+    saved = graph.get_state(THREAD).values["messages"]
+    execute_message = next(m for m in saved if isinstance(m, ToolMessage) and m.tool_call_id == "execute-1")
+    content = json.loads(execute_message.content)
+    assert execute_message.artifact is None
+    assert len(content["results"]) == TOOL_RESULT_PREVIEW_ROWS
+    assert content["results_truncated"] is True
+    assert content["row_count"] == len(ROWS)
+
+
+def test_restored_thread_reads_artifacts_and_ignores_earlier_turns(graph):
+    ask(graph, "run sql")
+
+    # Messages restored from the SQLite checkpoint
+    restored = graph.get_state(THREAD).values["messages"]
+    reflect_message = next(m for m in restored if isinstance(m, ToolMessage) and m.tool_call_id == "reflect-1")
+    assert reflect_message.artifact == REFLECTION
+    assert collect_tool_results(restored, {})[1] == REFLECTION
+
+    # The next turn on the same thread must not fail on, or report, the old results
+    assert ask(graph, "thanks") == ([], None, None, None)
@@ -0,0 +1,44 @@
+import threading
+import time
+import health
+from shared_state import SharedCache
+
+
+def fresh_record(age_seconds: float = 0.0) -> dict:
+    return {"status": "ok", "checked_at": time.time() - age_seconds,
+            "latency_ms": 1.0, "details": {}, "error": None}
+
+
+def test_cached_status_does_not_wait_on_the_shared_store(monkeypatch):
+    monkeypatch.setattr(health, "_latest_records", {"agent": fresh_record()})
+
+    # Simulate a probe tick stuck in the shared store (e.g. a busy SQLite file)
+    entered, release = threading.Event(), threading.Event()
+
+    def stuck_claim(self, key, ttl):
+        entered.set()
+        release.wait(timeout=5)
+        return 1.0  # Lease held elsewhere, so the tick skips every probe
+
+    monkeypatch.setattr(SharedCache, "claim", stuck_claim)
+    probe_tick = threading.Thread(target=health._run_probes, args=(True,))
+    probe_tick.start()
+    try:
+        assert entered.wait(timeout=5)
+
+        start_time = time.perf_counter()
+        status = health.get_cached_status()
+        assert time.perf_counter() - start_time < 0.1
+    finally:
+        release.set()
+        probe_tick.join(timeout=5)
+
+    assert status["agent"]["status"] == "ok"
+    assert status["llm"]["status"] == "unknown"
+
+
+def test_old_results_are_reported_stale(monkeypatch):
+    interval = health.probes["agent"].interval_seconds
+    monkeypatch.setattr(health, "_latest_records", {"agent": fresh_record(age_seconds=3 * interval)})
+
+    assert health.get_cached_status()["agent"]["status"] == "stale"
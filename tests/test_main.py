@@ -0,0 +1,48 @@
+import asyncio
+import time
+import httpx
+from langchain_core.messages import AIMessage
+import main
+import tools
+
+SLOW_AGENT_SECONDS = 1.5
+
+
+class SlowAgent:
+    """Stands in for the compiled graph: blocks like a real agent run."""
+
+    def __init__(self):
+        self.saw_capture_dict = None
+
+    def invoke(self, state, config=None):
+        self.saw_capture_dict = tools.execution_results.get() is not None
+        time.sleep(SLOW_AGENT_SECONDS)
+        return {"messages": [*state["messages"], AIMessage(content="done")]}
+
+
+def test_status_answers_while_a_chat_request_is_running(monkeypatch):
+    slow_agent = SlowAgent()
+    monkeypatch.setattr(main, "agent", slow_agent)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start_time = time.perf_counter()
+            chat = asyncio.create_task(client.post("/api/chat", json={"message": "hi"}))
+            await asyncio.sleep(0.2)  # Let the chat request reach agent.invoke
+
+            status = await client.get("/status")
+            status_seconds = time.perf_counter() - start_time
+            chat_still_running = not chat.done()
+
+            return status, status_seconds, chat_still_running, await chat
+
+    status, status_seconds, chat_still_running, chat = asyncio.run(scenario())
+
+    assert status.status_code == 200
+    assert chat_still_running
+    assert status_seconds < SLOW_AGENT_SECONDS / 2
+    assert chat.status_code == 200
+    assert chat.json()["success"] is True
+    # The capture dict still reaches the worker thread running the graph
+    assert slow_agent.saw_capture_dict is True
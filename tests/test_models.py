@@ -0,0 +1,37 @@
+from models import SqlExecutionResult
+
+
+def test_to_dict_truncates_rows_and_drops_empty_fields():
+    result = SqlExecutionResult(
+        sql_query="SELECT 1",
+        success=True,
+        analysis="ok",
+        results=[{"n": i} for i in range(5)],
+        row_count=5,
+    )
+
+    assert result.to_dict(max_rows=2) == {
+        "sql_query": "SELECT 1",
+        "results": [{"n": 0}, {"n": 1}],
+        "row_count": 5,
+        "success": True,
+        "analysis": "ok",
+        "results_truncated": True,
+    }
+
+
+def test_to_dict_keeps_all_rows_within_limit():
+    result = SqlExecutionResult(sql_query="SELECT 1", success=True, analysis="ok",
+                                results=[{"n": 0}], row_count=1)
+
+    assert result.to_dict(max_rows=2)["results"] == [{"n": 0}]
+    assert "results_truncated" not in result.to_dict(max_rows=2)
+    assert result.to_dict()["results"] == [{"n": 0}]
+
+
+def test_to_dict_keeps_empty_results_and_falsey_values():
+    result = SqlExecutionResult(sql_query="SELECT 1", success=False, analysis="",
+                                results=[], row_count=0)
+
+    assert result.to_dict() == {"sql_query": "SELECT 1", "results": [], "row_count": 0,
+                                "success": False, "analysis": ""}
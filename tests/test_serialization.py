@@ -0,0 +1,34 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+import serialization
+from serialization import dumps_compact
+
+
+def stdlib_compact(obj) -> bytes:
+    """The old tool encoding (json.dumps(default=str)), minus the indentation."""
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+PAYLOADS = [
+    {"saledate": datetime(2024, 1, 2, 3, 4, 5), "day": date(2024, 1, 2), "amount": Decimal("12.50")},
+    {"rows": [{"qty": 1.5, "name": "Café", "note": None, "ok": True}]},
+    {1: "int key", None: "null key", True: "bool key"},
+    {"big": 2**70, "negative": -(2**65)},
+]
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_matches_stdlib_default_str_encoding(payload):
+    assert dumps_compact(payload) == stdlib_compact(payload)
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_stdlib_fallback_matches(payload, monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert dumps_compact(payload) == stdlib_compact(payload)
+
+
+def test_output_is_compact():
+    assert dumps_compact({"a": [1, 2]}) == b'{"a":[1,2]}'
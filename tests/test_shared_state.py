@@ -0,0 +1,34 @@
+import time
+from shared_state import SharedCache
+
+
+def test_claim_is_exclusive_until_lease_expires(tmp_path):
+    leases = SharedCache("leases", path=str(tmp_path / "state.sqlite"))
+
+    assert leases.claim("job", ttl=0.2) is None
+    retry_after = leases.claim("job", ttl=0.2)
+    assert retry_after is not None and 0 < retry_after <= 0.2
+
+    time.sleep(0.25)
+    assert leases.claim("job", ttl=0.2) is None
+
+
+def test_claim_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    worker_a, worker_b = SharedCache("leases", path=path), SharedCache("leases", path=path)
+
+    assert worker_a.claim("job", ttl=60) is None
+    assert worker_b.claim("job", ttl=60) > 59
+
+
+def test_get_and_get_all_skip_expired_entries(tmp_path):
+    cache = SharedCache("cache", path=str(tmp_path / "state.sqlite"))
+    other_namespace = SharedCache("other", path=str(tmp_path / "state.sqlite"))
+
+    cache.set("fresh", {"rows": [1, 2]})
+    cache.set("expired", "gone", ttl=-1)
+    other_namespace.set("fresh", "not mine")
+
+    assert cache.get("fresh") == {"rows": [1, 2]}
+    assert cache.get("expired") is None
+    assert cache.get_all() == {"fresh": {"rows": [1, 2]}}
@@ -1,34 +1,98 @@
 import re
-import json
 import time
-from config import llm, ENABLE_SERVER_SQL_EXEC
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Annotated
+from config import llm, ENABLE_SERVER_SQL_EXEC, TOOL_RESULT_PREVIEW_ROWS
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
+from langchain_core.tools import tool, InjectedToolCallId
 try:
     # `retriever` may be None when server-side DB access is disabled.
     from db_setup import retriever
 except ImportError:
     retriever = None
 from helpers import get_database_schema, execute_database_query
-from models import QueryReflection
+from models import QueryReflection, SqlExecutionResult
+from serialization import dumps_compact
 
-sql_prompt = ChatPromptTemplate.from_template(
-    """
+# Full SQL results for the current request, keyed by tool_call_id. They are
+# kept out of the ToolMessage (and so out of every checkpoint of the thread)
+# and handed straight to the HTTP layer instead.
+execution_results: ContextVar[dict | None] = ContextVar("execution_results", default=None)
+
+
+@contextmanager
+def capture_execution_results():
+    """Collect the SqlExecutionResult of every execute_sql_with_analysis call
+    made while the block runs, keyed by tool_call_id."""
+    results: dict[str, SqlExecutionResult] = {}
+    token = execution_results.set(results)
+    try:
+        yield results
+    finally:
+        execution_results.reset(token)
+
+
+def _capture_execution_result(tool_call_id: str, result: SqlExecutionResult):
+    captured = execution_results.get()
+    if captured is not None:
+        captured[tool_call_id] = result
+
+# Prompts put their static text first and the per-call values last, so the
+# prefix sent to the provider stays byte-identical between calls and can be
+# served from its prompt cache.
+sql_prompt = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """
 You are an expert SQL generator.
+Write ONLY the SQL query, with no explanation or code fences.
+""",
+    ),
+    (
+        "human",
+        """
 You have access to the following table schemas (only the most relevant ones are shown):
 
 {schemas}
 
 QUESTION:
 {question}
-
-Write ONLY the SQL query, with no explanation or code fences.
-"""
-)
+""",
+    ),
+])
 
 sql_chain = sql_prompt | llm | StrOutputParser()
 
+json_parser = JsonOutputParser(pydantic_object=QueryReflection)
+
+reflection_prompt = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """
+You are a Senior SQL Developer reviewing a query for accuracy and best practices.
+
+Database Schema:
+{schema}
+
+Analyse the SQL query you are given and provide structured feedback **strictly** in the
+following JSON format (no additional keys, no additional text):
+
+{format_instructions}
+""",
+    ),
+    (
+        "human",
+        """
+Original Question: {question}
+Generated SQL Query: {sql_query}
+""",
+    ),
+]).partial(format_instructions=json_parser.get_format_instructions())
+
+reflection_chain = reflection_prompt | llm | json_parser
+
 @tool
 def generate_sql(question: str) -> str:
     """Convert a natural-language question into a SQL query.
@@ -57,49 +121,24 @@ def generate_sql(question: str) -> str:
     except Exception as e:
         return f"Error generating SQL: {str(e)}"
 
-@tool
-def reflect_on_sql(sql_query: str, original_question: str) -> str:
+@tool(response_format="content_and_artifact")
+def reflect_on_sql(sql_query: str, original_question: str) -> tuple[str, dict]:
     """
     NEW TOOL: Analyze and validate a SQL query before execution.
     This is like having a senior developer review the code!
     """
-    schema = get_database_schema()
-
-    json_parser = JsonOutputParser(pydantic_object=QueryReflection)
-    format_instructions = json_parser.get_format_instructions()
-
-    reflection_prompt = ChatPromptTemplate.from_template(
-        """
-You are a Senior SQL Developer reviewing a query for accuracy and best practices.
-
-Database Schema:
-{schema}
-
-Original Question: {question}
-Generated SQL Query: {sql_query}
-
-Analyse this SQL query and provide structured feedback **strictly** in the
-following JSON format (no additional keys, no additional text):
-
-{format_instructions}
-"""
-    )
-    
-    reflection_chain = reflection_prompt | llm | json_parser
-    
     try:
         reflection_result = reflection_chain.invoke({
-            "schema": schema,
+            "schema": get_database_schema(),
             "question": original_question,
             "sql_query": sql_query,
-            "format_instructions": format_instructions
         })
         
         print(f"🔍 Reflection confidence: {reflection_result.get('confidence', 'unknown')}/10")
         print(f"🔍 Valid: {reflection_result.get('is_valid', 'unknown')}")
         print(f"🔍 Matches intent: {reflection_result.get('matches_intent', 'unknown')}")
         
-        return json.dumps(reflection_result, indent=2)
+        return dumps_compact(reflection_result).decode(), reflection_result
         
     except Exception as e:
         # Fallback reflection if structured parsing fails
@@ -117,24 +156,23 @@ following JSON format (no additional keys, no additional text):
             "confidence": 1,
             "explanation": f"Reflection failed: {str(e)}"
         }
-        return json.dumps(fallback_reflection, indent=2)
+        return dumps_compact(fallback_reflection).decode(), fallback_reflection
 
 @tool
-def execute_sql_with_analysis(sql_query: str) -> str:
+def execute_sql_with_analysis(sql_query: str, tool_call_id: Annotated[str, InjectedToolCallId]) -> str:
     """Execute a SQL query and return comprehensive results with analysis.
 
     When server-side execution is disabled the function returns a stub payload
     containing the SQL and a message instructing the caller to run it locally.
     """
     if not ENABLE_SERVER_SQL_EXEC:
-        return json.dumps(
-            {
-                "sql_query": sql_query,
-                "success": False,
-                "analysis": "Server-side execution disabled; please run this query against your own database and get the results",
-            },
-            indent=2,
+        result = SqlExecutionResult(
+            sql_query=sql_query,
+            success=False,
+            analysis="Server-side execution disabled; please run this query against your own database and get the results",
         )
+        _capture_execution_result(tool_call_id, result)
+        return dumps_compact(result.to_dict()).decode()
 
     start_time = time.time()
     
@@ -144,15 +182,15 @@ def execute_sql_with_analysis(sql_query: str) -> str:
         execution_time = time.time() - start_time
         
         if count == 0:
-            result = {
-                "sql_query": sql_query,
-                "results": [],
-                "row_count": 0,
-                "execution_time_seconds": execution_time,
-                "success": True,
-                "message": "Query executed successfully but returned no results",
-                "analysis": "No data matches the query criteria. Consider checking if data exists or modifying query conditions."
-            }
+            result = SqlExecutionResult(
+                sql_query=sql_query,
+                results=[],
+                row_count=0,
+                execution_time_seconds=execution_time,
+                success=True,
+                message="Query executed successfully but returned no results",
+                analysis="No data matches the query criteria. Consider checking if data exists or modifying query conditions."
+            )
         else:
             # Basic analysis of results
             if count > 0:
@@ -166,27 +204,29 @@ def execute_sql_with_analysis(sql_query: str) -> str:
             else:
                 analysis = "Query executed but no results found."
         
-            result = {
-                "sql_query": sql_query,
-                "results": results,
-                "row_count": count,
-                "execution_time_seconds": round(execution_time, 3),
-                "success": True,
-                "analysis": analysis
-            }
-        
-        return json.dumps(result, indent=2, default=str)
+            result = SqlExecutionResult(
+                sql_query=sql_query,
+                results=results,
+                row_count=count,
+                execution_time_seconds=round(execution_time, 3),
+                success=True,
+                analysis=analysis
+            )
         
     except Exception as e:
         execution_time = time.time() - start_time
-        error_result = {
-            "sql_query": sql_query,
-            "error": str(e),
-            "execution_time_seconds": round(execution_time, 3),
-            "success": False,
-            "analysis": f"Query execution failed: {str(e)}"
-        }
-        return json.dumps(error_result, indent=2)
+        result = SqlExecutionResult(
+            sql_query=sql_query,
+            error=str(e),
+            execution_time_seconds=round(execution_time, 3),
+            success=False,
+            analysis=f"Query execution failed: {str(e)}"
+        )
+
+    # The model only needs a preview to write its insights; the full rows
+    # go to the HTTP layer through the per-request side channel.
+    _capture_execution_result(tool_call_id, result)
+    return dumps_compact(result.to_dict(max_rows=TOOL_RESULT_PREVIEW_ROWS)).decode()
     
 
 